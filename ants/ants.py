@@ -3,17 +3,21 @@
 import random
 import sys
 from ucb import main, interact, trace
-from collections import OrderedDict
 
 
 ################
 # Core Classes #
 ################
 
+VERBOSE = True  # Print a message for each game event; cleared by --quiet
+
 
 class Place:
     """A Place holds insects and has an exit to another Place."""
 
+    __slots__ = ('name', 'exit', 'bees', 'ant', 'entrance', 'colony',
+                 'idx', 'entrance_chain')
+
     def __init__(self, name, exit=None):
         """Create a Place with the given exit.
 
@@ -25,9 +29,12 @@ class Place:
         self.bees = []        # A list of Bees
         self.ant = None       # An Ant
         self.entrance = None  # A Place
+        self.colony = None    # The AntColony, set when this Place is registered
+        self.idx = None       # Registration order, set when registered
+        self.entrance_chain = None  # Places toward the Hive, set by configure
         # Phase 1: Add an entrance to the exit
 
-        if (self.exit != None):
+        if (self.exit is not None):
             exit.entrance = self
 
     def add_insect(self, insect):
@@ -42,18 +49,22 @@ class Place:
         if insect.is_ant:
             # Phase 4: Special handling for BodyguardAnt
     
-            if (self.ant != None) and (self.ant.can_contain(insect)):
+            if (self.ant is not None) and (self.ant.can_contain(insect)):
                 self.ant.contain_ant(insect)
                 insect.place = self
-            elif (self.ant != None) and (insect.can_contain(self.ant)):
+            elif (self.ant is not None) and (insect.can_contain(self.ant)):
                 insect.contain_ant(self.ant)
+                self._untrack(self.ant)
                 self.ant = insect
+                self._track(insect)
                 insect.place = self
             else:
                 assert self.ant is None, 'Two ants in {0}'.format(self)
                 self.ant = insect
+                self._track(insect)
         else:
             self.bees.append(insect)
+            self._track(insect)
         insect.place = self
 
     def remove_insect(self, insect):
@@ -62,6 +73,8 @@ class Place:
             assert self.ant == insect, '{0} is not in {1}'.format(insect, self)
             if insect.container is True:
                 self.ant = insect.ant
+                if self.ant is not None:
+                    self._track(self.ant)
             elif (isinstance(insect, QueenAnt)) and (not insect.imposter):
                 return None
             else:
@@ -70,8 +83,49 @@ class Place:
         else:
             self.bees.remove(insect)
 
+        self._untrack(insect)
         insect.place = None
 
+    def damage_all_bees(self, amount):
+        """Reduce the armor of every Bee in this Place by amount."""
+        for bee in self.bees[:]:
+            bee.reduce_armor(amount)
+
+    def build_entrance_chain(self, hive):
+        """Return a list of the Places reached by following entrances from
+        this Place (inclusive) up to, but not including, the hive."""
+        chain = []
+        place = self
+        while place is not None and place is not hive:
+            chain.append(place)
+            place = place.entrance
+        return chain
+
+    def _track(self, insect):
+        """Record insect in the insect registries of this Place's colony."""
+        if self.colony is not None:
+            if insect.is_ant:
+                # Keep ants in place order, the order in which they act
+                ants = self.colony._ants
+                i = len(ants)
+                while i > 0 and ants[i - 1].place.idx > self.idx:
+                    i -= 1
+                ants.insert(i, insect)
+            else:
+                self.colony._bees[insect] = None
+
+    def _untrack(self, insect):
+        """Drop insect from the insect registries of this Place's colony."""
+        if self.colony is not None:
+            if insect.is_ant:
+                self.colony._ants.remove(insect)
+            else:
+                del self.colony._bees[insect]
+
+    @property
+    def has_bees(self):
+        return bool(self.bees)
+
     def __str__(self):
         return self.name
 
@@ -98,7 +152,8 @@ class Insect:
         """
         self.armor -= amount
         if self.armor <= 0:
-            print('{0} ran out of armor and expired'.format(self))
+            if VERBOSE:
+                print('{0} ran out of armor and expired'.format(self))
             self.place.remove_insect(self)
 
     def action(self, colony):
@@ -131,9 +186,8 @@ class Bee(Insect):
         """Return True if this Bee cannot advance to the next Place."""
         # Phase 3: Special handling for NinjaAnt
 
-        if (self.place.ant is None) or (self.place.ant.blocks_path == False):
-            return False
-        return True
+        ant = self.place.ant
+        return ant is not None and ant.blocks_path
 
     def action(self, colony):
         """A Bee's action stings the Ant that blocks its exit if it is blocked,
@@ -141,10 +195,14 @@ class Bee(Insect):
 
         colony -- The AntColony, used to access game state information.
         """
+        place = self.place
         if self.blocked():
-            self.sting(self.place.ant)
-        elif self.place is not colony.hive and self.armor > 0:
-            self.move_to(self.place.exit)
+            self.sting(place.ant)
+        elif place is not colony.hive and self.armor > 0:
+            self.move_to(place.exit)
+
+
+_ant_registry = []  # All subclasses of Ant, filled in by Ant.__init_subclass__
 
 
 class Ant(Insect):
@@ -161,6 +219,11 @@ class Ant(Insect):
         """Create an Ant with an armor quantity."""
         Insect.__init__(self, armor)
 
+    def __init_subclass__(cls, **kwargs):
+        """Record every Ant subclass, in definition order, for ant_types."""
+        super().__init_subclass__(**kwargs)
+        _ant_registry.append(cls)
+
     def can_contain(self, other):
         return (self.container) and (not other.container) and (not self.ant)
 
@@ -186,7 +249,7 @@ class HarvesterAnt(Ant):
 def random_or_none(s):
     """Return a random element of sequence s, or return None if s is empty."""
     if s:
-        return random.choice(s)
+        return s[0] if len(s) == 1 else random.choice(s)
 
 
 class ThrowerAnt(Ant):
@@ -208,15 +271,13 @@ class ThrowerAnt(Ant):
         This method returns None if there is no such Bee (or none in range).
         """
 
-        i = 0
-        nearest_place = self.place
-        while (nearest_place.bees == []) and (nearest_place.entrance != hive):
-            nearest_place = nearest_place.entrance
-            i += 1
-        if (nearest_place == hive):
-            return None
-        elif (self.min_range <= i) and (i <= self.max_range) and (nearest_place.bees != []):
-            return random_or_none(nearest_place.bees)
+        chain = self.place.entrance_chain
+        if chain is None:
+            chain = self.place.build_entrance_chain(hive)
+        end = self.max_range + 1 if self.max_range < len(chain) else None
+        for place in chain[self.min_range:end]:
+            if place.bees:
+                return random_or_none(place.bees)
 
     def throw_at(self, target):
         """Throw a leaf at the target Bee, reducing its armor."""
@@ -234,21 +295,35 @@ class Hive(Place):
     assault_plan -- An AssaultPlan; when & where bees enter the colony.
     """
 
+    __slots__ = ('assault_plan', '_waves', '_next_wave', '_exits')
+
     def __init__(self, assault_plan):
         self.name = 'Hive'
         self.assault_plan = assault_plan
-        self.bees = []
-        for bee in assault_plan.all_bees:
-            self.add_insect(bee)
+        self.bees = assault_plan.all_bees
+        for bee in self.bees:
+            bee.place = self
+        self.colony = None
+        self.idx = None
+        self._waves = sorted(assault_plan.items())  # (time, bees) pairs
+        self._next_wave = 0
+        self._exits = None
         # The following attributes are always None for a Hive
         self.entrance = None
         self.ant = None
         self.exit = None
+        self.entrance_chain = None
 
     def strategy(self, colony):
-        exits = [p for p in colony.places.values() if p.entrance is self]
-        for bee in self.assault_plan.get(colony.time, []):
-            bee.move_to(random.choice(exits))
+        if self._exits is None:
+            self._exits = [p for p in colony.places.values() if p.entrance is self]
+        waves = self._waves
+        while self._next_wave < len(waves) and waves[self._next_wave][0] < colony.time:
+            self._next_wave += 1
+        if self._next_wave < len(waves) and waves[self._next_wave][0] == colony.time:
+            for bee in waves[self._next_wave][1]:
+                bee.move_to(random.choice(self._exits))
+            self._next_wave += 1
 
 
 class AntColony:
@@ -275,35 +350,46 @@ class AntColony:
         self.food = food
         self.strategy = strategy
         self.hive = hive
-        self.ant_types = OrderedDict((a.name, a) for a in ant_types)
+        self.ant_types = {a.name: a for a in ant_types}
         self.configure(hive, create_places)
 
     def configure(self, hive, create_places):
         """Configure the places in the colony."""
         self.queen = Place('AntQueen')
-        self.places = OrderedDict()
+        self.places = {}
         self.bee_entrances = []
+        self._ants = []  # Ants occupying a registered place, in place order
+        self._bees = {}  # Bees in a registered place, as an insertion-ordered set
         def register_place(place, is_bee_entrance):
+            place.idx = len(self.places)
             self.places[place.name] = place
+            place.colony = self
+            if place.ant is not None:
+                self._ants.append(place.ant)
+            for bee in place.bees:
+                self._bees[bee] = None
             if is_bee_entrance:
                 place.entrance = hive
                 self.bee_entrances.append(place)
         register_place(self.hive, False)
         create_places(self.queen, register_place)
+        for place in self.places.values():
+            if place is not hive:
+                place.entrance_chain = place.build_entrance_chain(hive)
 
     def simulate(self):
         """Simulate an attack on the ant colony (i.e., play the game)."""
-        while len(self.queen.bees) == 0 and len(self.bees) > 0:
+        while not self.queen.has_bees and self._bees:
             self.hive.strategy(self)    # Bees invade
             self.strategy(self)         # Ants deploy
-            for ant in self.ants:       # Ants take actions
+            for ant in list(self._ants):    # Ants take actions
                 if ant.armor > 0:
                     ant.action(self)
-            for bee in self.bees:       # Bees take actions
+            for bee in list(self._bees):    # Bees take actions
                 if bee.armor > 0:
                     bee.action(self)
             self.time += 1
-        if len(self.queen.bees) > 0:
+        if self.queen.has_bees:
             print('The ant queen has perished. Please try again.')
         else:
             print('All bees are vanquished. You win!')
@@ -315,7 +401,8 @@ class AntColony:
         """
         constructor = self.ant_types[ant_type_name]
         if self.food < constructor.food_cost:
-            print('Not enough food remains to place ' + ant_type_name)
+            if VERBOSE:
+                print('Not enough food remains to place ' + ant_type_name)
         else:
             self.places[place_name].add_insect(constructor())
             self.food -= constructor.food_cost
@@ -328,11 +415,11 @@ class AntColony:
 
     @property
     def ants(self):
-        return [p.ant for p in self.places.values() if p.ant is not None]
+        return list(self._ants)
 
     @property
     def bees(self):
-        return [b for p in self.places.values() for b in p.bees]
+        return list(self._bees)
 
     @property
     def insects(self):
@@ -345,12 +432,7 @@ class AntColony:
 
 def ant_types():
     """Return a list of all implemented Ant classes."""
-    all_ant_types = []
-    new_types = [Ant]
-    while new_types:
-        new_types = [t for c in new_types for t in c.__subclasses__()]
-        all_ant_types.extend(new_types)
-    return [t for t in all_ant_types if t.implemented]
+    return [t for t in _ant_registry if t.implemented]
 
 def interactive_strategy(colony):
     """A strategy that starts an interactive session and lets the user make
@@ -375,8 +457,13 @@ def start_with_strategy(args, strategy):
                         help='loads a difficult assault plan')
     parser.add_argument('--food', type=int,
                         help='number of food to start with', default=2)
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='do not print individual game events')
     args = parser.parse_args()
 
+    global VERBOSE
+    VERBOSE = not args.quiet
+
     assault_plan = make_test_assault_plan()
     layout = test_layout
     food = args.food
@@ -465,12 +552,15 @@ def make_insane_assault_plan():
 class Water(Place):
     """Water is a place that can only hold 'watersafe' insects."""
 
+    __slots__ = ()
+
     def add_insect(self, insect):
         """Add insect if it is watersafe, otherwise reduce its armor to 0."""
-        print('added', insect, insect.watersafe)
+        if VERBOSE:
+            print('added', insect, insect.watersafe)
 
         Place.add_insect(self, insect)
-        if (insect.watersafe == False):
+        if (not insect.watersafe):
             insect.reduce_armor(insect.armor)
 
 class FireAnt(Ant):
@@ -485,18 +575,8 @@ class FireAnt(Ant):
     def reduce_armor(self, amount):
 
         self.armor -= amount
-        i = 0
-        len_bees = len(self.place.bees)
-
-        if (self.place.bees != []) and (self.armor <= 0):
-            while (i < len_bees):
-                if (self.place.bees[i].armor <= self.damage):
-                    self.place.bees[i].reduce_armor(self.damage)
-                    len_bees -= 1
-                    i -= 1
-                else:
-                    self.place.bees[i].reduce_armor(self.damage)
-                i += 1
+        if self.armor <= 0:
+            self.place.damage_all_bees(self.damage)
 
 class LongThrower(ThrowerAnt):
     """A ThrowerAnt that only throws leaves at Bees at least 4 places away."""
@@ -505,17 +585,7 @@ class LongThrower(ThrowerAnt):
     implemented = True
     food_cost = 3
     min_range = 4
-
-    def nearest_bee(self, hive):
-        i = 0
-        nearest_place = self.place
-        while (nearest_place.entrance != hive):
-            nearest_place = nearest_place.entrance
-            i += 1
-            if (self.min_range <= i) and (nearest_place.bees != []):
-                return random_or_none(nearest_place.bees)
-            elif (nearest_place == hive):
-                return None
+    max_range = float('inf')
 
 
 class ShortThrower(ThrowerAnt):
@@ -547,18 +617,7 @@ class NinjaAnt(Ant):
 
     def action(self, colony):
 
-        i = 0
-        len_bees = len(self.place.bees)
-
-        if (len_bees != []):
-            while (i < len_bees):
-                if (self.place.bees[i].armor <= self.damage):
-                    self.place.bees[i].reduce_armor(self.damage)
-                    i -= 1
-                    len_bees -= 1
-                else:
-                    self.place.bees[i].reduce_armor(self.damage)
-                i += 1
+        self.place.damage_all_bees(self.damage)
 
 
 # The ScubaThrower class
@@ -592,7 +651,7 @@ class HungryAnt(Ant):
         if (self.digest > 0):
             self.digest -= 1
         else:
-            if (self.place.bees != []):
+            if self.place.bees:
                 self.eat_bee(random_or_none(self.place.bees))
                 self.digest = self.time_to_digest
 
@@ -613,7 +672,7 @@ class BodyguardAnt(Ant):
 
     def action(self, colony):
 
-        if (self.ant != None):
+        if (self.ant is not None):
             self.ant.action(colony)
 
 class LaserAnt(ThrowerAnt):
@@ -639,14 +698,11 @@ class QueenPlace:
 
     @property
     def bees(self):
+        return self.colony_queen.bees + self.ant_queen.bees
 
-        total = []
-        if self.colony_queen.bees != []:
-            total += self.colony_queen.bees
-        if self.ant_queen.bees != []:
-            total += self.ant_queen.bees
-
-        return total
+    @property
+    def has_bees(self):
+        return bool(self.colony_queen.bees) or bool(self.ant_queen.bees)
 
 class QueenAnt(ScubaThrower):  # You should change this line
     """The Queen of the colony.  The game is over if a bee enters her place."""
@@ -656,11 +712,13 @@ class QueenAnt(ScubaThrower):  # You should change this line
     implemented = True
     exists = False
     food_cost = 6
-    strength = []
     imposter = False
 
     def __init__(self, armor=1):
         super(ScubaThrower, self).__init__(armor)
+        self.strength = set()  # Ants whose damage this queen has doubled
+        self.tunnel = None     # Places in the queen's tunnel, excluding her own
+        self.tunnel_place = None  # The Place from which tunnel was built
         if not QueenAnt.exists:
             QueenAnt.exists = True
         else:
@@ -673,41 +731,49 @@ class QueenAnt(ScubaThrower):  # You should change this line
 
         Impostor queens do only one thing: reduce their own armor to 0.
         """
-        if (not hasattr(colony.queen, 'QueenPlace')):
-            colony.queen = QueenPlace(colony.queen, self.place)
-
-        if (self.imposter == True):
+        if (self.imposter):
             self.reduce_armor(self.armor)
 
         else:
+            if not isinstance(colony.queen, QueenPlace):
+                colony.queen = QueenPlace(colony.queen, self.place)
 
-            def strength_check(place):
-
-                if (current_place.ant != None) and (current_place.ant not in self.strength):
-                    current_place.ant.damage = current_place.ant.damage * 2
-                    self.strength.append(current_place.ant)
-
-                    if (current_place.ant.container == True) and (current_place.ant.ant) and (current_place.ant.ant not in self.strength):
-                        current_place.ant.ant.damage = current_place.ant.ant.damage * 2
-                        self.strength.append(current_place.ant.ant)
-
-            current_place = self.place
-            
             super(ScubaThrower, self).action(colony)
 
-            if (current_place.ant.container == True) and (current_place.ant not in self.strength):
-                current_place.ant.damage = current_place.ant.damage * 2
-                self.strength.append(current_place.ant)
-
-            while (current_place.entrance != None):
-                current_place = current_place.entrance
-                strength_check(current_place)
-
-            current_place = self.place
-
-            while (current_place.exit != None):
-                current_place = current_place.exit
-                strength_check(current_place)
+            strength = self.strength
+            own_place = self.place
+            guard = own_place.ant
+            if (guard.container) and (guard not in strength):
+                guard.damage = guard.damage * 2
+                strength.add(guard)
+
+            if self.tunnel_place is not own_place:
+                self.tunnel = self.build_tunnel()
+                self.tunnel_place = own_place
+
+            for place in self.tunnel:
+                ant = place.ant
+                if (ant is not None) and (ant not in strength):
+                    ant.damage = ant.damage * 2
+                    strength.add(ant)
+
+                    contained = ant.ant if ant.container else None
+                    if (contained) and (contained not in strength):
+                        contained.damage = contained.damage * 2
+                        strength.add(contained)
+
+    def build_tunnel(self):
+        """Return the Places reached from the queen's Place by following
+        entrances and then by following exits, excluding her own Place."""
+        chain = self.place.entrance_chain
+        if chain is None:
+            chain = self.place.build_entrance_chain(None)
+        tunnel = chain[1:]
+        current_place = self.place
+        while (current_place.exit is not None):
+            current_place = current_place.exit
+            tunnel.append(current_place)
+        return tunnel
 
 
 class AntRemover(Ant):
@@ -112,6 +112,22 @@ test = {
           'hidden': False,
           'locked': False
         },
+        {
+          'code': r"""
+          >>> # Testing Imposter Queen acting before the true Queen
+          >>> colony.places['tunnel_0_4'].add_insect(queen)
+          >>> colony.places['tunnel_0_1'].add_insect(imposter)
+          >>> for ant in colony.ants:
+          ...     ant.action(colony)
+          QueenAnt(0, tunnel_0_1) ran out of armor and expired
+          >>> bee = ants.Bee(3)
+          >>> colony.places['tunnel_0_4'].add_insect(bee)
+          >>> len(colony.queen.bees) > 0 # Game should have ended
+          True
+          """,
+          'hidden': False,
+          'locked': False
+        },
         {
           'code': r"""
           >>> # Testing Imposter Queen